@@ -1,15 +1,41 @@
 import csv
+import sys
 from datetime import datetime
 from os import getenv
 
 from dotenv import load_dotenv
 
-from s3_docs import DocxS3Uploader, clear_proxy_environment
+from s3_docs import DOCX_CONTENT_TYPE, DocxS3Uploader, clear_proxy_environment
 
 load_dotenv()
 
 import asyncio
 
+# Через сколько строк CSV файл сбрасывается на диск
+CSV_FLUSH_EVERY = 64
+
+
+async def write_results(queue, csvfile):
+    """
+    Пишет строки CSV по мере завершения загрузок, пока в очередь не придет None
+
+    :param queue: Очередь с результатами загрузки (путь_к_файлу, результат, ссылка)
+    :param csvfile: Открытый на запись CSV файл с результатами
+    """
+    fieldnames = ['имя_файла', 'ссылка']
+    writer = csv.DictWriter(csvfile, fieldnames=fieldnames, delimiter=';')
+    writer.writeheader()
+    written = 0
+    while (result := await queue.get()) is not None:
+        file, _, url = result
+        if not url:
+            continue
+        writer.writerow({'имя_файла': file.split("/")[-1], 'ссылка': url})
+        written += 1
+        # Периодически сбрасываем буфер, чтобы результаты сохранились даже при падении
+        if written % CSV_FLUSH_EVERY == 0:
+            csvfile.flush()
+
 
 async def main():
     # Очищаем прокси-настройки из окружения
@@ -23,38 +49,48 @@ async def main():
         endpoint_url=getenv("S3_ENDPOINT"),
     )
 
-    # Проверяем соединение, получая список бакетов
-    buckets = await uploader.list_buckets()
-    if not buckets:
-        print("Не удалось подключиться к S3 сервису. Проверьте учетные данные и endpoint.")
-        return
-
-    print(f"Доступные бакеты: {buckets}")
-
-    # Загружаем все docx файлы из папки
-
-    results = await uploader.upload_folder(
-        folder_path="images" if getenv("CONTENT_TYPE") == "image/png" else "templates",  # Укажите путь к вашей папке с docx файлами
-        prefix="",  # Опциональный префикс для имен файлов в S3
-        content_type=getenv("CONTENT_TYPE")
-    )
-
+    # Бакет заранее не проверяется: upload_folder создаст его при первой ошибке NoSuchBucket,
+    # а проблемы с подключением видны по ошибкам загрузки отдельных файлов
     csv_filename = f"upload_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
 
-    # Выводим результаты
-    with open(csv_filename, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['имя_файла', 'ссылка']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames, delimiter=';')
-        writer.writeheader()
-        for file, (success, url) in results.items():
-            file = file.split("/")[-1]
-            status = "Успешно" if success else "Ошибка"
-            if url:
-                print(f"{file}: {status} - Ссылка: {url}")
-                writer.writerow({'имя_файла': file, 'ссылка': url})
-            else:
-                print(f"{file}: не загружен")
-
+    # Файл открывается до загрузки, чтобы ошибка ввода-вывода проявилась сразу
+    with open(csv_filename, 'w', newline='', encoding='utf-8', buffering=1 << 20) as csvfile:
+        # CSV пишется параллельно с загрузкой, по мере поступления результатов
+        queue = asyncio.Queue()
+        writer_task = asyncio.create_task(write_results(queue, csvfile))
+
+        # Загружаем все docx файлы из папки
+        upload_task = asyncio.create_task(uploader.upload_folder(
+            folder_path="images" if getenv("CONTENT_TYPE") == "image/png" else "templates",  # Укажите путь к вашей папке с docx файлами
+            prefix="",  # Опциональный префикс для имен файлов в S3
+            content_type=getenv("CONTENT_TYPE", DOCX_CONTENT_TYPE),
+            result_queue=queue
+        ))
+
+        def stop_upload_on_writer_error(task):
+            # Если запись CSV упала, результаты некуда сохранять - останавливаем загрузку
+            if not task.cancelled() and task.exception() is not None:
+                upload_task.cancel()
+
+        writer_task.add_done_callback(stop_upload_on_writer_error)
+        try:
+            results = await upload_task
+        finally:
+            queue.put_nowait(None)
+            # Ошибка записи CSV пробрасывается вместо отмены загрузки
+            await writer_task
+
+    # Выводим результаты одной записью в stdout, а не print на каждый файл
+    lines = []
+    for file, success, url in results:
+        file = file.split("/")[-1]
+        status = "Успешно" if success else "Ошибка"
+        if url:
+            lines.append(f"{file}: {status} - Ссылка: {url}")
+        else:
+            lines.append(f"{file}: не загружен")
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
 
 
 if __name__ == "__main__":
@@ -1,16 +1,60 @@
 import os
+import ssl
+import socket
 import asyncio
+from functools import partial
 from botocore.exceptions import ClientError
 import logging
-from pathlib import Path
-import aiofiles
+import aiohttp
 import aioboto3
+import botocore.session
 from botocore.config import Config
+from botocore.httpsession import get_cert_path
+from aiobotocore.config import AioConfig
+from aiobotocore.httpsession import AIOHTTPSession
+
+# content type DOCX файлов, используется по умолчанию
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+# Файлы больше этого размера загружаются параллельными частями (multipart upload)
+MULTIPART_THRESHOLD = 16 * 1024 * 1024
+# Файлы меньше этого размера отправляются одним bytes-буфером, а не потоком
+SMALL_FILE_THRESHOLD = 64 * 1024
+# Размер одной части multipart загрузки
+MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+
+
+class _S3HTTPSession(AIOHTTPSession):
+    """
+    HTTP сессия aiobotocore с настраиваемым буфером отправки сокета и общим SSL контекстом.
+    Применяет к сокетам socket_options botocore, которые AIOHTTPSession игнорирует.
+    """
+
+    def __init__(self, *args, send_buffer_size=None, ssl_context=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        socket_options = list(self._socket_options)
+        if send_buffer_size is not None:
+            socket_options.append((socket.SOL_SOCKET, socket.SO_SNDBUF, send_buffer_size))
+        self._connector_args = {
+            **self._connector_args,
+            'socket_factory': partial(_create_socket, socket_options)
+        }
+        self._ssl_context = ssl_context
+
+    def _create_connector(self, proxy_url):
+        # Готовый SSL контекст не пересоздается и не перечитывает сертификаты для каждого клиента
+        if self._ssl_context is None or proxy_url:
+            return super()._create_connector(proxy_url)
+        return aiohttp.TCPConnector(
+            limit=self._max_pool_connections,
+            ssl=self._ssl_context,
+            **self._connector_args
+        )
 
 
 class DocxS3Uploader:
     def __init__(self, aws_access_key_id, aws_secret_access_key, bucket_name,
-                 endpoint_url="https://s3.firstvds.ru:443"):
+                 endpoint_url="https://s3.firstvds.ru:443", max_concurrency=16,
+                 max_part_concurrency=4, send_buffer_size=None, verify_ssl=False):
         """
         Инициализация класса для загрузки DOCX файлов на S3-совместимое хранилище
 
@@ -18,19 +62,90 @@ class DocxS3Uploader:
         :param aws_secret_access_key: Секретный ключ доступа S3
         :param bucket_name: Имя S3 бакета
         :param endpoint_url: URL endpoint для S3-совместимого хранилища
+        :param max_concurrency: Максимальное число одновременных загрузок
+        :param max_part_concurrency: Максимальное число одновременно загружаемых частей одного файла
+        :param send_buffer_size: Размер буфера отправки сокета (SO_SNDBUF) для каждого соединения.
+                                 None - буфер подбирает ядро. На Linux явный SO_SNDBUF отключает
+                                 автонастройку буфера и ограничен net.core.wmem_max, поэтому
+                                 на каналах с большой задержкой он может снизить скорость
+        :param verify_ssl: Проверять ли SSL сертификат хранилища. При True SSL контекст
+                           с сертификатами CA создается один раз и переиспользуется
         """
         self.aws_access_key_id = aws_access_key_id
         self.aws_secret_access_key = aws_secret_access_key
         self.endpoint_url = endpoint_url
         self.bucket_name = bucket_name
+        self.max_concurrency = max_concurrency
+        self.max_part_concurrency = max_part_concurrency
+        self.send_buffer_size = send_buffer_size
+        self.verify_ssl = verify_ssl
+        self._ssl_context = ssl.create_default_context(cafile=get_cert_path(True)) if verify_ssl else None
         # Создаем конфигурацию без прокси
-        self.boto_config = Config(
+        self.boto_config = AioConfig(
+            http_session_cls=partial(
+                _S3HTTPSession,
+                send_buffer_size=send_buffer_size,
+                ssl_context=self._ssl_context
+            ),
             proxies={'http': None, 'https': None},
             retries={'max_attempts': 3, 'mode': 'standard'},
             connect_timeout=20,
-            read_timeout=60
+            read_timeout=60,
+            # Пул соединений соответствует числу одновременных загрузок
+            max_pool_connections=max_concurrency
         )
+        # Параметры клиента собираются один раз и переиспользуются всеми клиентами
+        self._client_params = {
+            'endpoint_url': self.endpoint_url,
+            'config': self.boto_config,
+            'verify': verify_ssl
+        }
         self.logger = self._setup_logger()
+        # Сессия создается один раз, клиент открывается в __aenter__ и переиспользуется
+        self._session = aioboto3.Session(
+            aws_access_key_id=self.aws_access_key_id,
+            aws_secret_access_key=self.aws_secret_access_key
+        )
+        self._s3_context = None
+        self._s3 = None
+        self._enter_depth = 0
+        # Защищает открытие и закрытие общего клиента от конкурентных входов в контекст
+        self._client_lock = asyncio.Lock()
+        # Бакет создается лениво, при первой ошибке NoSuchBucket, только одной задачей
+        self._bucket_lock = asyncio.Lock()
+        self._bucket_ready = False
+        # Синхронный клиент только для локальной подписи URL, в сеть он не обращается,
+        # поэтому получает обычный Config без настроек соединения aiohttp
+        self._presign_client = botocore.session.get_session().create_client(
+            's3',
+            endpoint_url=self.endpoint_url,
+            aws_access_key_id=self.aws_access_key_id,
+            aws_secret_access_key=self.aws_secret_access_key,
+            config=Config()
+        )
+
+    async def __aenter__(self):
+        """
+        Открывает общий S3 клиент, который используется всеми методами класса.
+        Повторный вход в контекст переиспользует уже открытый клиент.
+        """
+        async with self._client_lock:
+            if self._enter_depth == 0:
+                s3_context = self._session.client('s3', **self._client_params)
+                self._s3 = await s3_context.__aenter__()
+                self._s3_context = s3_context
+            self._enter_depth += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Закрывает общий S3 клиент при выходе из внешнего контекста"""
+        async with self._client_lock:
+            self._enter_depth -= 1
+            if self._enter_depth == 0:
+                s3_context = self._s3_context
+                self._s3_context = None
+                self._s3 = None
+                await s3_context.__aexit__(exc_type, exc_val, exc_tb)
 
     def _setup_logger(self):
         """Настройка логгера"""
@@ -44,51 +159,51 @@ class DocxS3Uploader:
             logger.addHandler(handler)
         return logger
 
-    def _get_client_config(self):
+    def _presign(self, object_key):
         """
-        Создает базовую конфигурацию для boto3 клиентов
+        Локально подписывает presigned URL без обращения к сети и без await
 
-        :return: Словарь с параметрами конфигурации
+        :param object_key: Ключ (путь) объекта в S3
+        :return: presigned URL или None, если подписать не удалось
         """
-        return {
-            'endpoint_url': self.endpoint_url,
-            'config': self.boto_config,
-            'verify': False
-        }
+        try:
+            return self._presign_client.generate_presigned_url(
+                'get_object',
+                Params={'Bucket': self.bucket_name, 'Key': object_key},
+                ExpiresIn=604800  # URL будет действителен 7 дней
+            )
+        except Exception as e:
+            self.logger.warning(f"Ошибка при локальной подписи URL для {object_key}: {e}")
+            return None
 
-    async def get_file_url(self, object_key):
+    async def get_file_url(self, s3, object_key):
         """
         Получает URL для доступа к объекту в S3
 
+        :param s3: Открытый S3 клиент
         :param object_key: Ключ (путь) объекта в S3
         :return: URL для доступа к объекту
         """
         # Попробуем получить presigned URL, который точно будет работать
-        session = aioboto3.Session(
-            aws_access_key_id=self.aws_access_key_id,
-            aws_secret_access_key=self.aws_secret_access_key
-        )
-
         try:
-            client_params = self._get_client_config()
-            async with session.client('s3', **client_params) as s3:
-                presigned_url = await s3.generate_presigned_url(
-                    'get_object',
-                    Params={'Bucket': self.bucket_name, 'Key': object_key},
-                    ExpiresIn=604800  # URL будет действителен 7 дней
-                )
-                self.logger.info(f"Сгенерирован presigned URL для {object_key}")
-                return presigned_url
+            presigned_url = await s3.generate_presigned_url(
+                'get_object',
+                Params={'Bucket': self.bucket_name, 'Key': object_key},
+                ExpiresIn=604800  # URL будет действителен 7 дней
+            )
+            self.logger.info(f"Сгенерирован presigned URL для {object_key}")
+            return presigned_url
         except Exception as e:
             self.logger.warning(f"Ошибка при создании presigned URL: {e}, возвращаем стандартный URL")
             # Если presigned URL не работает, вернем path-style URL как наиболее совместимый
             return f"{self.endpoint_url}/{self.bucket_name}/{object_key}"
 
-    async def upload_file(self, file_path, object_name=None,
-                          content_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document"):
+    async def upload_file(self, s3, file_path, object_name=None,
+                          content_type=DOCX_CONTENT_TYPE):
         """
         Асинхронная загрузка файла на S3
 
+        :param s3: Открытый S3 клиент
         :param file_path: Путь к файлу для загрузки
         :param object_name: Имя объекта в S3. Если None, используется имя файла
         :param content_type: content type объекта
@@ -98,35 +213,165 @@ class DocxS3Uploader:
         if object_name is None:
             object_name = os.path.basename(file_path)
 
-        session = aioboto3.Session(
-            aws_access_key_id=self.aws_access_key_id,
-            aws_secret_access_key=self.aws_secret_access_key
-        )
+        if not await self._upload_object(s3, file_path, object_name, content_type):
+            return False, None
+        return True, await self._get_url(s3, object_name)
+
+    async def _get_url(self, s3, object_key):
+        """
+        Возвращает URL объекта: подписывает его локально,
+        асинхронный клиент используется как запасной вариант
+
+        :param s3: Открытый S3 клиент
+        :param object_key: Ключ (путь) объекта в S3
+        :return: URL для доступа к объекту
+        """
+        return self._presign(object_key) or await self.get_file_url(s3, object_key)
+
+    async def _upload_object(self, s3, file_path, object_name, content_type):
+        """
+        Загружает файл на S3 без получения ссылки
 
+        :param s3: Открытый S3 клиент
+        :param file_path: Путь к файлу для загрузки
+        :param object_name: Имя объекта в S3
+        :param content_type: content type объекта
+        :return: True если файл успешно загружен, иначе False
+        """
+        # Размер нужен для выбора способа загрузки, а пропавший файл не стоит загружать
         try:
-            # Передаем конфигурацию в клиент
-            client_params = self._get_client_config()
-            async with session.client('s3', **client_params) as s3:
-                self.logger.info(f"Начинаем загрузку файла {file_path}")
-                async with aiofiles.open(file_path, 'rb') as file:
-                    content = await file.read()
-                    await s3.put_object(
-                        Bucket=self.bucket_name,
-                        Key=object_name,
-                        Body=content,
-                        ContentType=content_type
-                    )
-            self.logger.info(f"Файл {file_path} успешно загружен как {object_name}")
+            file_size = (await asyncio.to_thread(os.stat, file_path)).st_size
+        except FileNotFoundError:
+            self.logger.error(f"Файл {file_path} не найден, пропускаем загрузку")
+            return False
+        except OSError as e:
+            # Битая ссылка, нет прав и т.п. - ошибка одного файла, а не всей загрузки
+            self.logger.error(f"Не удалось получить информацию о файле {file_path}: {e}")
+            return False
 
-            # Получаем URL файла
-            file_url = await self.get_file_url(object_name)
-            return True, file_url
+        try:
+            self.logger.info(f"Начинаем загрузку файла {file_path}")
+            try:
+                await self._put_file(s3, file_path, object_name, content_type, file_size)
+            except ClientError as e:
+                # Бакет не проверяется заранее: создаем его при первой ошибке и повторяем загрузку
+                if e.response.get('Error', {}).get('Code', '') != 'NoSuchBucket':
+                    raise
+                if not await self._ensure_bucket():
+                    raise
+                await self._put_file(s3, file_path, object_name, content_type, file_size)
+            self.logger.info(f"Файл {file_path} успешно загружен как {object_name}")
+            return True
         except ClientError as e:
             self.logger.error(f"Ошибка при загрузке файла {file_path}: {e}")
-            return False, None
+            return False
         except Exception as e:
             self.logger.error(f"Неожиданная ошибка при загрузке файла {file_path}: {e}")
-            return False, None
+            return False
+
+    async def _put_file(self, s3, file_path, object_name, content_type, file_size):
+        """
+        Загружает файл одним запросом или частями, в зависимости от размера
+
+        :param s3: Открытый S3 клиент
+        :param file_path: Путь к файлу для загрузки
+        :param object_name: Имя объекта в S3
+        :param content_type: content type объекта
+        :param file_size: Размер файла в байтах
+        """
+        # Файл передается потоком, а не читается в память целиком
+        if file_size > MULTIPART_THRESHOLD:
+            await self._upload_multipart(s3, file_path, object_name, content_type, file_size)
+            return
+
+        # aiobotocore не принимает aiofiles в Body, но читает обычный файл частями.
+        # aiohttp читает файл в пуле потоков по 64 КБ, поэтому маленький файл
+        # дешевле прочитать сразу и отправить одной записью
+        with open(file_path, 'rb') as file:
+            body = file.read() if file_size < SMALL_FILE_THRESHOLD else file
+            await s3.put_object(
+                Bucket=self.bucket_name,
+                Key=object_name,
+                Body=body,
+                # Размер уже известен, botocore не нужно определять его по телу запроса
+                ContentLength=file_size,
+                ContentType=content_type
+            )
+
+    async def _ensure_bucket(self):
+        """
+        Создает бакет после ошибки NoSuchBucket. Конкурентные задачи ждут,
+        пока бакет создаст первая из них
+
+        :return: True если бакет создан или уже существует, иначе False
+        """
+        async with self._bucket_lock:
+            if not self._bucket_ready:
+                self.logger.info(f"Пробуем создать бакет {self.bucket_name}")
+                self._bucket_ready = await self.create_bucket_if_not_exists()
+            return self._bucket_ready
+
+    async def _upload_multipart(self, s3, file_path, object_name, content_type, file_size):
+        """
+        Загружает большой файл параллельными частями через multipart upload.
+        Каждая часть читается по смещению в пуле потоков, временные файлы не создаются.
+
+        :param s3: Открытый S3 клиент
+        :param file_path: Путь к файлу для загрузки
+        :param object_name: Имя объекта в S3
+        :param content_type: content type объекта
+        :param file_size: Размер файла в байтах
+        """
+        # Имя бакета читается один раз, а не в каждой части
+        bucket = self.bucket_name
+        response = await s3.create_multipart_upload(
+            Bucket=bucket,
+            Key=object_name,
+            ContentType=content_type
+        )
+        upload_id = response['UploadId']
+        semaphore = asyncio.Semaphore(self.max_part_concurrency)
+
+        async def upload_part(part_number, offset):
+            async with semaphore:
+                body = await asyncio.to_thread(_read_range, file_path, offset, MULTIPART_CHUNKSIZE)
+                part = await s3.upload_part(
+                    Bucket=bucket,
+                    Key=object_name,
+                    PartNumber=part_number,
+                    UploadId=upload_id,
+                    Body=body
+                )
+                return {'PartNumber': part_number, 'ETag': part['ETag']}
+
+        tasks = [
+            asyncio.create_task(upload_part(part_number, offset))
+            for part_number, offset in enumerate(range(0, file_size, MULTIPART_CHUNKSIZE), start=1)
+        ]
+        try:
+            parts = await asyncio.gather(*tasks)
+            await s3.complete_multipart_upload(
+                Bucket=bucket,
+                Key=object_name,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+        except BaseException:
+            # gather не отменяет остальные части: останавливаем их до прерывания загрузки
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.logger.warning(f"Прерываем multipart загрузку {object_name}")
+            try:
+                await s3.abort_multipart_upload(
+                    Bucket=bucket,
+                    Key=object_name,
+                    UploadId=upload_id
+                )
+            except Exception as e:
+                # Ошибка прерывания не должна скрывать исходную ошибку
+                self.logger.error(f"Не удалось прервать multipart загрузку {object_name}: {e}")
+            raise
 
     async def check_bucket_exists(self):
         """
@@ -134,21 +379,15 @@ class DocxS3Uploader:
 
         :return: True если бакет существует, иначе False
         """
-        session = aioboto3.Session(
-            aws_access_key_id=self.aws_access_key_id,
-            aws_secret_access_key=self.aws_secret_access_key
-        )
-
         try:
-            # Передаем конфигурацию в клиент
-            client_params = self._get_client_config()
-            async with session.client('s3', **client_params) as s3:
-                self.logger.info(f"Проверяем существование бакета {self.bucket_name}")
-                # Печатаем для отладки
-                self.logger.info(f"Используем endpoint: {self.endpoint_url}")
-                await s3.head_bucket(Bucket=self.bucket_name)
-                self.logger.info(f"Бакет {self.bucket_name} существует")
-                return True
+            self.logger.info(f"Проверяем существование бакета {self.bucket_name}")
+            # Печатаем для отладки
+            self.logger.info(f"Используем endpoint: {self.endpoint_url}")
+            # Вне контекста uploader открывает клиент сам, внутри переиспользует общий
+            async with self:
+                await self._s3.head_bucket(Bucket=self.bucket_name)
+            self.logger.info(f"Бакет {self.bucket_name} существует")
+            return True
         except ClientError as e:
             error_code = e.response.get('Error', {}).get('Code', '')
             if error_code == '404':
@@ -172,18 +411,11 @@ class DocxS3Uploader:
         if await self.check_bucket_exists():
             return True
 
-        session = aioboto3.Session(
-            aws_access_key_id=self.aws_access_key_id,
-            aws_secret_access_key=self.aws_secret_access_key
-        )
-
         try:
-            # Передаем конфигурацию в клиент
-            client_params = self._get_client_config()
-            async with session.client('s3', **client_params) as s3:
-                await s3.create_bucket(Bucket=self.bucket_name)
-                self.logger.info(f"Бакет {self.bucket_name} успешно создан")
-                return True
+            async with self:
+                await self._s3.create_bucket(Bucket=self.bucket_name)
+            self.logger.info(f"Бакет {self.bucket_name} успешно создан")
+            return True
         except ClientError as e:
             self.logger.error(f"Ошибка при создании бакета {self.bucket_name}: {e}")
             return False
@@ -197,94 +429,133 @@ class DocxS3Uploader:
 
         :return: Список имен бакетов или пустой список в случае ошибки
         """
-        session = aioboto3.Session(
-            aws_access_key_id=self.aws_access_key_id,
-            aws_secret_access_key=self.aws_secret_access_key
-        )
-
         try:
-            # Передаем конфигурацию в клиент
-            client_params = self._get_client_config()
-            async with session.client('s3', **client_params) as s3:
-                response = await s3.list_buckets()
-                buckets = [bucket['Name'] for bucket in response.get('Buckets', [])]
-                self.logger.info(f"Доступные бакеты: {buckets}")
-                return buckets
+            async with self:
+                response = await self._s3.list_buckets()
+            buckets = [bucket['Name'] for bucket in response.get('Buckets', [])]
+            self.logger.info(f"Доступные бакеты: {buckets}")
+            return buckets
         except Exception as e:
             self.logger.error(f"Ошибка при получении списка бакетов: {e}")
             return []
 
-    async def upload_folder(self, folder_path, prefix="", content_type=None):
+    async def upload_folder(self, folder_path, prefix="", content_type=DOCX_CONTENT_TYPE,
+                            result_queue=None):
         """
         Асинхронно загружает все DOCX файлы из указанной папки на S3
 
         :param folder_path: Путь к папке с DOCX файлами
         :param prefix: Префикс для имен объектов в S3
         :param content_type: content type объекта
-        :return: Словарь с результатами загрузки {имя_файла: (результат, ссылка)}
+        :param result_queue: asyncio.Queue, в которую кладется результат каждой загрузки
+                             сразу после ее завершения
+        :return: Список результатов загрузки [(путь_к_файлу, результат, ссылка)]
+                 в порядке завершения загрузок
         """
-        # Сначала проверим сервис - запросим список бакетов
-        buckets = await self.list_buckets()
-        if not buckets:
-            self.logger.error("Невозможно подключиться к S3 сервису или получить список бакетов")
-            return {}
-
-        if self.bucket_name not in buckets:
-            self.logger.info(f"Пробуем создать бакет {self.bucket_name}")
-            bucket_created = await self.create_bucket_if_not_exists()
-            if not bucket_created:
-                self.logger.error("Не удалось создать бакет")
-                return {}
-
-        folder = Path(folder_path)
-        if not folder.exists() or not folder.is_dir():
+        # Один S3 клиент на все операции загрузки
+        async with self:
+            return await self._upload_folder(folder_path, prefix, content_type, result_queue)
+
+    async def _upload_folder(self, folder_path, prefix, content_type, result_queue):
+        """Загрузка папки при уже открытом S3 клиенте"""
+        if not os.path.isdir(folder_path):
             self.logger.error(f"Папка {folder_path} не существует или не является директорией")
-            return {}
+            return []
 
-        files = list(folder.glob("**/*.png") if "png" in content_type else folder.glob("**/*.docx"))
+        files = list(_iter_files(folder_path, ".png" if "png" in content_type else ".docx", self.logger))
         if not files:
             self.logger.warning(f"В папке {folder_path} не найдено нужных файлов")
-            return {}
+            return []
 
         self.logger.info(f"Найдено {len(files)} DOCX файлов для загрузки")
 
-        tasks = []
-        file_object_names = {}  # Словарь для хранения соответствия файлов и их ключей в S3
+        # Ограничиваем число одновременных загрузок
+        semaphore = asyncio.Semaphore(self.max_concurrency)
 
-        for file_path in files:
-            # Создаем имя объекта в S3 с учетом префикса и относительного пути
-            relative_path = file_path.relative_to(folder)
-            object_name = f"{prefix}{relative_path}" if prefix else str(relative_path)
+        async def bounded_upload(file_path, object_name):
+            # Слот занят только на время загрузки, ссылка подписывается после его освобождения
+            async with semaphore:
+                success = await self._upload_object(self._s3, file_path, object_name, content_type)
+            return file_path, object_name, success
 
-            # Заменяем обратные слеши на прямые для совместимости с S3
-            object_name = object_name.replace("\\", "/")
+        tasks = []
 
-            # Сохраняем соответствие файла и его ключа в S3
-            file_object_names[str(file_path)] = object_name
+        for file_path, relative_path in files:
+            # Создаем имя объекта в S3 с учетом префикса и относительного пути,
+            # обратные слеши заменяем на прямые для совместимости с S3
+            object_name = (prefix + relative_path).replace("\\", "/")
 
             # Добавляем задачу на загрузку файла
-            tasks.append(self.upload_file(str(file_path), object_name, content_type))
-
-        # Выполняем все задачи конкурентно
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # Формируем словарь результатов
-        upload_results = {}
-        for file_path, result in zip(files, results):
-            str_path = str(file_path)
-            if isinstance(result, Exception):
-                self.logger.error(f"Исключение при загрузке {file_path}: {result}")
-                upload_results[str_path] = (False, None)
-            else:
-                success, url = result
-                upload_results[str_path] = (success, url)
+            tasks.append(asyncio.create_task(bounded_upload(file_path, object_name)))
 
-        successful = sum(1 for result, _ in upload_results.values() if result)
+        # Выполняем задачи конкурентно, не более max_concurrency одновременно,
+        # и отдаем результат каждой загрузки сразу после ее завершения
+        upload_results = []
+        try:
+            for task in asyncio.as_completed(tasks):
+                file_path, object_name, success = await task
+                url = await self._get_url(self._s3, object_name) if success else None
+                upload_results.append((file_path, success, url))
+                if result_queue is not None:
+                    result_queue.put_nowait((file_path, success, url))
+        finally:
+            # При отмене или ошибке незавершенные загрузки не должны пережить общий клиент
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        successful = sum(1 for _, success, _ in upload_results if success)
         self.logger.info(f"Загрузка завершена. Успешно: {successful}/{len(upload_results)}")
 
         return upload_results
 
 
+def _iter_files(root, extension, logger):
+    """
+    Обходит папку через os.scandir без создания объектов Path.
+    Недоступные папки пропускаются, как в Path.glob
+
+    :param root: Корневая папка
+    :param extension: Расширение искомых файлов, например ".docx"
+    :param logger: Логгер для сообщений о пропущенных папках
+    :return: Генератор пар (путь к файлу, путь относительно root)
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError as e:
+            logger.warning(f"Пропускаем недоступную папку {directory}: {e}")
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(extension):
+                    yield entry.path, os.path.relpath(entry.path, root)
+
+
+def _create_socket(socket_options, addr_info):
+    """Создает сокет для aiohttp и применяет к нему socket_options"""
+    family, type_, proto, _, _ = addr_info
+    sock = socket.socket(family=family, type=type_, proto=proto)
+    try:
+        for level, option, value in socket_options:
+            sock.setsockopt(level, option, value)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def _read_range(file_path, offset, size):
+    """Читает size байт файла начиная со смещения offset"""
+    with open(file_path, 'rb') as file:
+        file.seek(offset)
+        return file.read(size)
+
+
 # Добавим функцию для удаления всех возможных прокси-настроек из окружения
 def clear_proxy_environment():
     """Удаляет все переменные окружения, связанные с прокси"""
@@ -294,6 +565,5 @@ def clear_proxy_environment():
         'NO_PROXY', 'no_proxy'
     ]
     for var in proxy_vars:
-        if var in os.environ:
-            del os.environ[var]
+        os.environ.pop(var, None)
     return "Прокси-настройки удалены из переменных окружения"
\ No newline at end of file